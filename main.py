@@ -4,16 +4,40 @@
 #
 # Works on Render or any host. If Club Automation requires login, set CLUB_COOKIE
 # (see "Simple steps" below).
+#
+# Production start command (Render → Start Command, or the Procfile):
+#   USE_GEVENT=1 gunicorn main:app -k gevent -w 2 --worker-connections 1000 -b 0.0.0.0:$PORT
+# `python main.py` only starts the Werkzeug dev server.
+
+import os
+if os.environ.get("USE_GEVENT"):
+    # Must run before requests/ssl/threading are imported so outbound I/O yields
+    from gevent import monkey; monkey.patch_all()
 
-from flask import Flask, request, redirect, url_for, render_template_string, flash, jsonify
-from datetime import datetime, timezone, date, time as dtime
-import os, sqlite3, requests, re
-from bs4 import BeautifulSoup
+from flask import Flask, Response, request, session, redirect, url_for, flash, jsonify, stream_with_context
+from datetime import datetime, date, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import wraps, lru_cache
+from collections import Counter
+import sqlite3, requests, re, threading, time, orjson, hashlib, random
+from html import unescape
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+from markupsafe import Markup, escape
+from flask_compress import Compress
+from flask.json.provider import DefaultJSONProvider
 
 APP_NAME = "CourtCaptain"
 PREFERRED_COURTS = ["Court 1", "Court 2", "Court 3", "Court 4"]
 ALL_COURTS = PREFERRED_COURTS + ["Court 5", "Court 6", "Court 7", "Outdoor A", "Outdoor B", "Other"]
+OTHER_COURTS = [c for c in ALL_COURTS if c not in PREFERRED_COURTS]
 DAYS = ["Saturday", "Sunday"]
+DAY_RANK = {d: i for i, d in enumerate(DAYS)}  # tiebreak order: earlier day wins
+# O(1) membership for request validation; keep the lists above for ordered iteration
+_DAYS_SET = frozenset(DAYS)
+_COURTS_SET = frozenset(ALL_COURTS)
 
 # ------ Environment (Render → Environment) ------
 RESET_PIN   = os.environ.get("RESET_PIN", "1234")
@@ -21,37 +45,119 @@ SECRET_KEY  = os.environ.get("SECRET_KEY", "replace-me")
 BOOKING_URL = os.environ.get("BOOKING_URL", "https://walmart.clubautomation.com/event/reserve-court-new")
 LAT = float(os.environ.get("WALTON_LAT", "36.372"))
 LON = float(os.environ.get("WALTON_LON", "-94.208"))
+# The venue's timezone: "this weekend" is counted on its calendar, not the server's (UTC)
+VENUE_TZ = ZoneInfo(os.environ.get("VENUE_TZ", "America/Chicago"))
 # If the site needs login, paste your browser cookie value here (Render → Environment)
 CLUB_COOKIE = os.environ.get("CLUB_COOKIE", "")
+# How long (seconds) to reuse fetched availability / weather before hitting upstream again
+CACHE_TTL_AVAIL = int(os.environ.get("CACHE_TTL_AVAIL", "60"))
+CACHE_TTL_WX    = int(os.environ.get("CACHE_TTL_WX", "900"))
+# Background refresh interval (seconds) that keeps those caches warm; 0 disables it
+CACHE_REFRESH_SECS = int(os.environ.get("CACHE_REFRESH_SECS", "30"))
 
 DB_PATH = "data.db"
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
+# br/gzip for HTML/CSS/JSON; tiny bodies like /health aren't worth compressing
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_LEVEL"] = 6
+app.config["COMPRESS_MIN_SIZE"] = 500
+# Streamed /results isn't compressed: Flask-Compress doesn't flush per chunk, so it
+# would hold the shell back until the whole body is rendered (and it only offers
+# zstd/br/deflate for streams). Cached /results bodies go out whole, and compressed.
+app.config["COMPRESS_STREAMS"] = False
+Compress(app)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify()/session JSON through orjson (sorted keys, like Flask's default provider)."""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        body = orjson.dumps(self._prepare_response_obj(args, kwargs),
+                            default=self.default, option=orjson.OPT_SORT_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+app.json = OrjsonProvider(app)
 
 # ---------------- DB ----------------
+# One long-lived autocommit connection for the whole process (WAL, synchronous=NORMAL).
+# sqlite3 objects aren't safe for concurrent use, so hold DB_LOCK around every use.
+# Rows come back as plain tuples (no sqlite3.Row wrapping); callers unpack positionally.
+_conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+_conn.execute("PRAGMA journal_mode=WAL")
+_conn.execute("PRAGMA synchronous=NORMAL")
+_conn.execute("PRAGMA temp_store=MEMORY")
+_conn.execute("PRAGMA cache_size=-20000")   # ~20 MB page cache
+_conn.execute("PRAGMA mmap_size=67108864")  # read pages straight from a 64 MB map
+_conn.execute("PRAGMA busy_timeout=5000")   # other gunicorn workers may hold the write lock
+DB_LOCK = threading.Lock()
+
 def db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _conn
+
+SCHEMA_VERSION = 2  # bump when init_db() gains a migration
+
+def name_key(name):
+    """One vote per person: 'Sam', ' sam' and 'SAM' (and 'ÉMILE'/'émile') share a key."""
+    return name.strip().casefold()
 
 def init_db():
-    conn = db()
+    """Create/migrate the votes table and indexes, then stamp PRAGMA user_version."""
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     # minimal vote: name + day + time_text (free text like "9:00-10:00" or "10am")
+    # name_key = name_key(name), so "Sam" and "sam" share one vote
     c.execute("""CREATE TABLE IF NOT EXISTS votes(
         name      TEXT PRIMARY KEY,
         day       TEXT NOT NULL,
         time_text TEXT NOT NULL,
-        ts        TEXT NOT NULL
+        ts        TEXT NOT NULL,
+        name_key  TEXT
     )""")
+    # migrate databases created before name_key: backfill, keep each person's latest vote
+    try:
+        c.execute("ALTER TABLE votes ADD COLUMN name_key TEXT")
+    except sqlite3.OperationalError:
+        pass  # column already exists
+    # (re)compute every key in Python, with the same function the vote handler uses;
+    # SQLite's LOWER() only folds ASCII, which left keys like 'Émile' behind
+    c.execute("DROP INDEX IF EXISTS idx_votes_name_key")
+    c.executemany("UPDATE votes SET name_key=? WHERE rowid=?",
+                  [(name_key(n), rid) for rid, n in c.execute("SELECT rowid, name FROM votes").fetchall()])
+    c.execute("""DELETE FROM votes WHERE EXISTS (
+        SELECT 1 FROM votes v2 WHERE v2.name_key = votes.name_key
+           AND (v2.ts > votes.ts OR (v2.ts = votes.ts AND v2.rowid > votes.rowid)))""")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_votes_name_key ON votes(name_key)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_votes_day_time ON votes(day, time_text)")
+    # /results' COUNT(*), MAX(ts) stamp runs on every hit (304s included): index-only via ts
+    c.execute("CREATE INDEX IF NOT EXISTS idx_votes_ts ON votes(ts)")
+    c.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
     conn.commit(); conn.close()
-init_db()
+
+@app.cli.command("init-db")
+def init_db_command():
+    """flask --app main init-db: create/migrate the schema explicitly."""
+    init_db()
+
+# Every worker imports this module; only run the DDL/migrations when the schema is behind
+if _conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+    init_db()
 
 # --------------- Helpers ---------------
 TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::?(\d{2}))?\s*(am|pm|AM|PM)?\s*[-–—]\s*(\d{1,2})(?::?(\d{2}))?\s*(am|pm|AM|PM)?\b")
 ONE_TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::?(\d{2}))?\s*(am|pm|AM|PM)?\b")
+_WS_RE    = re.compile(r"\s+")
+_DASH_RE  = re.compile(r"\s*-\s*")
+_DIGIT_RE = re.compile(r"\d")
+# Tags (and script/style bodies, which page text never includes) for the raw-HTML text scan
+_TAG_RE   = re.compile(r"<script\b.*?</script>|<style\b.*?</style>|<[^>]+>", re.S | re.I)
 
+@lru_cache(maxsize=256)
 def to_minutes(h, m, ap=None):
     h = int(h); m = int(m) if m else 0
     if ap:
@@ -60,6 +166,7 @@ def to_minutes(h, m, ap=None):
         if ap == "am" and h == 12: h = 0
     return h*60 + m
 
+@lru_cache(maxsize=2048)
 def parse_time_window(text):
     """
     Parse "9-10am", "9:00-10:00", "9am-10am", "9:30–10:30", etc → (start_min, end_min)
@@ -81,133 +188,362 @@ def parse_time_window(text):
         return (t, t)
     return None
 
+# Upstream fetches run here so concurrent callers can share one in-flight Future
+FETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cc-fetch")
+
+def ttl_cache(ttl, jitter=0, grace=0):
+    """
+    Tiny in-process TTL cache keyed by positional args, with single-flight:
+    while a fetch for some args is running, other callers wait on the same Future.
+    Falsy results (e.g. a failed weather fetch) are not cached; the last good
+    value, even if expired, is returned instead when there is one.
+    fn.future(*args) returns the Future without blocking, so independent fetches
+    can overlap; fn.refresh(*args) refetches in the caller's thread (or waits on the
+    fetch already running) while readers keep getting the previous value; fn.peek(*args) returns a fresh cached value
+    or None without fetching. The uncached function stays reachable as fn._raw.
+    jitter spreads each expiry by up to ±jitter seconds so entries don't all lapse at once.
+    For grace seconds past expiry the old value is returned at once while a refetch
+    runs in the background; only older entries make the caller wait.
+    """
+    def deco(fn):
+        store = {}     # args -> (value, expires_at)
+        inflight = {}  # args -> Future
+        lock = threading.Lock()
+
+        def load(args, fut):
+            # fut is the Future registered in inflight[args] for this fetch
+            try:
+                value = fn(*args)
+                with lock:
+                    if value:
+                        store[args] = (value, time.monotonic() + ttl + random.uniform(-jitter, jitter))
+                    elif args in store:
+                        value = store[args][0]  # upstream down: serve stale
+                fut.set_result(value)
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with lock:
+                    if inflight.get(args) is fut:
+                        del inflight[args]
+
+        def done(value):
+            fut = Future()
+            fut.set_result(value)
+            return fut
+
+        def future(*args):
+            with lock:
+                hit = store.get(args)
+                now = time.monotonic()
+                if hit and hit[1] > now:
+                    return done(hit[0])
+                fut = inflight.get(args)
+                if fut is None:
+                    fut = inflight[args] = Future()
+                    FETCH_POOL.submit(load, args, fut)
+                if hit and now < hit[1] + grace:
+                    return done(hit[0])  # stale-while-revalidate: refetch runs in the pool
+                return fut
+
+        def refresh(*args):
+            # joins a fetch already in flight rather than starting a second one
+            with lock:
+                fut = inflight.get(args)
+                own = fut is None
+                if own:
+                    fut = inflight[args] = Future()
+            if own:
+                load(args, fut)
+            return fut.result()
+
+        def peek(*args):
+            with lock:
+                hit = store.get(args)
+            return hit[0] if hit and hit[1] > time.monotonic() else None
+
+        @wraps(fn)
+        def wrapper(*args):
+            return future(*args).result()
+        wrapper.peek = peek
+        wrapper.future = future
+        wrapper.refresh = refresh
+        wrapper._raw = fn
+        return wrapper
+    return deco
+
 def minute_diff(a, b):
     return abs(a - b)
 
-def majority_choice(votes):
+def majority_choice(tallies):
     """
-    From DB rows -> majority (day, time_window). If tie, prefer Saturday.
+    From grouped DB rows (day, time_text, cnt) -> majority (day, time_window).
+    Differently written times that parse to the same window are summed together.
+    Ties go to the earlier day (Saturday), then the earlier window; the result doesn't
+    depend on row order, so every caller picks the same majority.
     Returns {'day': 'Saturday', 'time_text': '9:00-10:00', 'window':(start,end), 'votes':N}
     """
     # counts by (day, normalized_time_window)
     buckets = {}
-    pretty_time = {}
-    for v in votes:
-        day = v["day"]
-        time_text = (v["time_text"] or "").strip()
+    pretty_time = {}  # key -> (-cnt, time_text): the most-voted spelling, then A→Z
+    for day, time_text, cnt in tallies:
+        time_text = time_text or ""
         win = parse_time_window(time_text)
         if not win:  # skip invalid
             continue
         key = (day, win)
-        buckets[key] = buckets.get(key, 0) + 1
-        # remember a nice display string
-        if key not in pretty_time: pretty_time[key] = time_text
+        buckets[key] = buckets.get(key, 0) + cnt
+        spelling = (-cnt, time_text)
+        if key not in pretty_time or spelling < pretty_time[key]: pretty_time[key] = spelling
 
     if not buckets:
         return None
 
-    ranked = sorted(
+    # only the top bucket matters
+    (day, win), count = max(
         buckets.items(),
-        key=lambda kv: (-kv[1], 0 if kv[0][0]=="Saturday" else 1)
+        key=lambda kv: (kv[1], -DAY_RANK.get(kv[0][0], len(DAYS)), -kv[0][1][0], -kv[0][1][1])
     )
-    (day, win), count = ranked[0]
-    return {"day": day, "window": win, "time_text": pretty_time[(day, win)], "votes": count}
+    return {"day": day, "window": win, "time_text": pretty_time[(day, win)][1], "votes": count}
+
+def current_majority(conn, rows=None):
+    """
+    Majority pick from the votes table, counted in SQL. Returns majority_choice(...).
+    Callers that already hold the (name, day, time_text) rows pass them as rows=
+    and the tally is done in Python instead of a second query; both give the same pick.
+    """
+    if rows is not None:
+        counts = Counter((day, time_text) for _, day, time_text in rows)
+        return majority_choice((day, t, n) for (day, t), n in counts.items())
+    # each distinct (day, time) string is parsed once; time_text is stored stripped,
+    # so the grouping can walk idx_votes_day_time
+    tallies = conn.execute(
+        "SELECT day, time_text, COUNT(*) AS cnt FROM votes "
+        "GROUP BY day, time_text ORDER BY cnt DESC, day, time_text"
+    ).fetchall()
+    return majority_choice(tallies)
+
+# ---- Outbound HTTP ----
+# One pooled keep-alive session for Open-Meteo and the per-court fetches,
+# so repeat calls reuse TCP/TLS connections instead of handshaking each time
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": f"{APP_NAME}/1.0"})
+# Two quick retries on connection drops / 5xx (all outbound calls are idempotent GETs)
+_RETRY = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=_RETRY))
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=_RETRY))
 
 # ---- Weather (with icon) via Open-Meteo ----
+# Open-Meteo weathercode reference:
+# 0 Clear, 1-3 Partly cloudy, 45/48 Fog, 51-57 Drizzle, 61-67 Rain, 71-77 Snow, 80-82 Rain showers, 95-99 Thunder
+WX_ICONS = {c: icon for codes, icon in (
+    ((0,), "☀️"), ((1,2,3), "⛅"), ((45,48), "🌫️"), ((51,53,55,56,57), "🌦️"),
+    ((61,63,65,66,67,80,81,82), "🌧️"), ((71,73,75,77), "❄️"), ((95,96,99), "⛈️"),
+) for c in codes}
+
 def weather_icon(code, pop):
     # Simple mapping for icons (emoji) by weathercode; fallback by precipitation
-    # Open-Meteo weathercode reference:
-    # 0 Clear, 1-3 Partly cloudy, 45/48 Fog, 51-57 Drizzle, 61-67 Rain, 71-77 Snow, 80-82 Rain showers, 95-99 Thunder
-    if code == 0: return "☀️"
-    if code in (1,2,3): return "⛅"
-    if code in (45,48): return "🌫️"
-    if code in (51,53,55,56,57): return "🌦️"
-    if code in (61,63,65,66,67,80,81,82): return "🌧️"
-    if code in (71,73,75,77): return "❄️"
-    if code in (95,96,99): return "⛈️"
-    if pop and int(pop) >= 50: return "🌧️"
-    return "🌤️"
+    return WX_ICONS.get(code) or ("🌧️" if pop and int(pop) >= 50 else "🌤️")
+
+# LAT/LON/VENUE_TZ are fixed for the process, so build the fixed part of the forecast URL
+# once. Open-Meteo reads start_date/end_date in the timezone it is given, so send the
+# same zone the dates are computed in.
+WX_URL = ("https://api.open-meteo.com/v1/forecast"
+          f"?latitude={LAT}&longitude={LON}"
+          "&daily=weathercode,temperature_2m_max,temperature_2m_min,precipitation_probability_max"
+          f"&timezone={VENUE_TZ.key}")
+WEEKEND = {5: "Saturday", 6: "Sunday"}  # date.weekday() -> name
+
+def wx_url(today=None):
+    """WX_URL limited to the coming Saturday/Sunday (on a Sunday: today through next Saturday)."""
+    today = today or datetime.now(VENUE_TZ).date()
+    sat = today + timedelta(days=(5 - today.weekday()) % 7)
+    sun = today + timedelta(days=(6 - today.weekday()) % 7)
+    return f"{WX_URL}&start_date={min(sat, sun)}&end_date={max(sat, sun)}"
+WX_TIMEOUT = (2, 6)   # (connect, read): a dead host fails fast, a slow one gets time to answer
+WX_FAIL_BACKOFF = 60  # seconds to skip Open-Meteo after a failed call
+_wx_fail_until = 0.0
 
+@ttl_cache(CACHE_TTL_WX, jitter=60, grace=CACHE_TTL_WX)
 def fetch_weather_days():
     """
     Return {'Saturday': {'tmax':..,'tmin':..,'pop':..,'code':..,'icon':'...'},
             'Sunday': {...}}
     """
+    global _wx_fail_until
     out = {}
+    # Upstream failed recently: don't block another request on its timeout
+    if time.monotonic() < _wx_fail_until:
+        return out
     try:
-        url = ("https://api.open-meteo.com/v1/forecast"
-               f"?latitude={LAT}&longitude={LON}"
-               "&daily=weathercode,temperature_2m_max,temperature_2m_min,precipitation_probability_max"
-               "&forecast_days=7&timezone=auto")
-        r = requests.get(url, timeout=8); r.raise_for_status()
-        d = r.json().get("daily", {})
+        r = SESSION.get(wx_url(), timeout=WX_TIMEOUT); r.raise_for_status()
+        d = orjson.loads(r.content).get("daily", {})
         times = d.get("time", [])
         tmax  = d.get("temperature_2m_max", [])
         tmin  = d.get("temperature_2m_min", [])
         pop   = d.get("precipitation_probability_max", [])
         code  = d.get("weathercode", [])
         for i, ds in enumerate(times):
-            y,m,dd = map(int, ds.split("-"))
-            wname = date(y,m,dd).strftime("%A")
-            if wname in ("Saturday","Sunday"):
+            wname = WEEKEND.get(date.fromisoformat(ds).weekday())
+            if wname:
                 icon = weather_icon(code[i] if i < len(code) else None,
                                     pop[i] if i < len(pop) else None)
                 out[wname] = {"tmax": tmax[i], "tmin": tmin[i],
                               "pop": pop[i], "code": code[i], "icon": icon}
         return out
     except Exception:
+        _wx_fail_until = time.monotonic() + WX_FAIL_BACKOFF
         return out
 
 # ---- Real-time availability from Club Automation ----
 BASE_CA_URL = "https://walmart.clubautomation.com/event/reserve-court-new"
 
+# Elements that usually carry a slot time on the reservation page
+SLOT_SELECTOR = ".slot, .time-slot, .slot-label, .reservation-time, time, [data-time]"
+# Every class in SLOT_SELECTOR matches this, so pages without <time>/[data-time]
+# markup only need these elements parsed
+SLOT_STRAINER = SoupStrainer(attrs={"class": re.compile(r"slot|reservation|time")})
+
+# Optional: read the day's grid view (all courts on one page) with a single request.
+# Set BULK_SCRAPE=1 if the reservation site lists every court per day.
+BULK_SCRAPE = os.environ.get("BULK_SCRAPE", "") == "1"
+BULK_SELECTOR = "[data-court], tr[data-court-id]"
+# Build only the court blocks (and their slots); a grid uses one of these two markups
+BULK_STRAINERS = (SoupStrainer(attrs={"data-court": True}), SoupStrainer("tr", attrs={"data-court-id": True}))
+# "court 1" / "1" / "outdoor a" → canonical court label
+COURT_BY_KEY = {c.lower(): c for c in ALL_COURTS}
+COURT_BY_KEY.update({c.split()[1]: c for c in ALL_COURTS if c.startswith("Court ")})
+
+def _slots_from_nodes(soup):
+    """Normalized slot strings from obvious slot elements → set."""
+    found = set()
+    for sn in soup.select(SLOT_SELECTOR):
+        t = sn.get("data-time") or sn.get_text(" ", strip=True)
+        t = _WS_RE.sub(" ", t or "").strip()
+        # Convert '9:00 AM - 10:00 AM' → '9:00-10:00' style (simple normalize)
+        t = t.replace("AM", "am").replace("PM", "pm")
+        t = _DASH_RE.sub("-", t)
+        if t and _DIGIT_RE.search(t):
+            found.add(t)
+    return found
+
+def _slots_from_text(text):
+    """Fallback: every time window written anywhere in the text → set."""
+    found = set()
+    for m in TIME_PATTERN.finditer(text):
+        sh, sm, sap, eh, em, eap = m.groups()
+        left = f"{sh}:{sm or '00'}{(''+sap).lower() if sap else ''}"
+        right = f"{eh}:{em or '00'}{(''+eap).lower() if eap else ''}"
+        found.add(f"{left}-{right}")
+    return found
+
+def _extract_slots(soup):
+    """Pull normalized slot strings out of a parsed page (or one court's subtree) → sorted list."""
+    found = _slots_from_nodes(soup) or _slots_from_text(soup.get_text(" ", strip=True))
+    return sorted(found)
+
+def _fetch_one_court(court, day, headers):
+    """Fetch one court page and extract its time slots → (court, sorted_slots)."""
+    params = {"day": day, "court": court}
+    r = SESSION.get(BASE_CA_URL, params=params, headers=headers, timeout=10)
+    r.raise_for_status()
+    html = r.text
+    if "<time" in html or "data-time" in html:
+        # <time>/[data-time] markup isn't caught by the strainer and may sit next to
+        # class-marked slots, so read the whole page
+        found = _slots_from_nodes(BeautifulSoup(html, "lxml"))
+    else:
+        found = _slots_from_nodes(BeautifulSoup(html, "lxml", parse_only=SLOT_STRAINER))
+    if not found:
+        # plain-text scan straight over the markup, no DOM walk
+        found = _slots_from_text(unescape(_TAG_RE.sub(" ", html)))
+    return court, sorted(found)
+
+def _fetch_bulk(day, headers):
+    """Fetch the day's grid view once → {court: sorted_slots} for the courts it lists."""
+    r = SESSION.get(BASE_CA_URL, params={"day": day}, headers=headers, timeout=10)
+    r.raise_for_status()
+    html = r.text
+    out = {}
+    for strainer in BULK_STRAINERS:
+        soup = BeautifulSoup(html, "lxml", parse_only=strainer)
+        for node in soup.select(BULK_SELECTOR):
+            key = (node.get("data-court") or node.get("data-court-id") or "").strip().lower()
+            court = COURT_BY_KEY.get(key)
+            if court:
+                out[court] = _extract_slots(node)
+        if out: break
+    return out
+
+AVAIL_FAIL_BACKOFF = 60  # seconds to skip the club site for a day after every court failed
+_avail_fail_until = {}   # day -> monotonic deadline
+
+@ttl_cache(CACHE_TTL_AVAIL, grace=CACHE_TTL_AVAIL)
 def fetch_availability_for_day(day):
     """
-    For the chosen day, fetch each court page and extract time slots.
-    Returns {'Court 1': ['9:00-10:00', ...], ...}
+    For the chosen day, fetch every court page concurrently and extract time slots
+    (or a single grid page when BULK_SCRAPE is on and it yields anything).
+    Returns {'Court 1': ['9:00-10:00', ...], ...}, or {} if no court could be fetched
+    (a court that fails on its own is left empty).
     NOTE: If the site needs login, set CLUB_COOKIE env var with your session cookie.
     """
+    # Site down recently: don't block another request on a 10-court fan-out of timeouts
+    if time.monotonic() < _avail_fail_until.get(day, 0):
+        return {}
     headers = {}
     if CLUB_COOKIE:
         headers["Cookie"] = CLUB_COOKIE
 
     slots_by_court = {c: [] for c in ALL_COURTS}
 
-    for court in ALL_COURTS:
+    if BULK_SCRAPE:
+        try:
+            bulk = _fetch_bulk(day, headers)
+        except Exception:
+            bulk = {}
+        if any(bulk.values()):
+            slots_by_court.update(bulk)
+            return slots_by_court
+
+    def safe_fetch(court):
         try:
-            params = {"day": day, "court": court}
-            r = requests.get(BASE_CA_URL, params=params, headers=headers, timeout=10)
-            r.raise_for_status()
-            html = r.text
-            soup = BeautifulSoup(html, "html.parser")
-
-            # 1) Try obvious slot elements
-            slot_nodes = soup.select(".slot, .time-slot, .slot-label, .reservation-time, time, [data-time]")
-            found = set()
-            for sn in slot_nodes:
-                t = sn.get("data-time") or sn.get_text(" ", strip=True)
-                t = re.sub(r"\s+", " ", t or "").strip()
-                # Convert '9:00 AM - 10:00 AM' → '9:00-10:00' style (simple normalize)
-                t = t.replace("AM", "am").replace("PM", "pm")
-                t = re.sub(r"\s*-\s*", "-", t)
-                if t and re.search(r"\d", t):
-                    found.add(t)
-
-            # 2) Fallback: scan all text for time windows
-            if not found:
-                for m in TIME_PATTERN.finditer(soup.get_text(" ", strip=True)):
-                    sh, sm, sap, eh, em, eap = m.groups()
-                    left = f"{sh}:{sm or '00'}{(''+sap).lower() if sap else ''}"
-                    right = f"{eh}:{em or '00'}{(''+eap).lower() if eap else ''}"
-                    found.add(f"{left}-{right}")
-
-            slots_by_court[court] = sorted(list(found))
+            return _fetch_one_court(court, day, headers)
         except Exception:
-            # leave it empty if error
-            pass
+            return court, None
+
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=len(ALL_COURTS)) as pool:
+        for court, slots in pool.map(safe_fetch, ALL_COURTS):
+            if slots is not None:
+                slots_by_court[court] = slots
+                fetched += 1
 
+    # Every court failed: the site is down, not fully booked. Return {} so ttl_cache
+    # keeps serving the last good slots instead of caching an all-empty grid.
+    if not fetched:
+        _avail_fail_until[day] = time.monotonic() + AVAIL_FAIL_BACKOFF
+        return {}
     return slots_by_court
 
+# ---- Background cache refresher ----
+def _refresher():
+    """Keep availability (every tick) and weather (about twice per TTL) warm."""
+    wx_every = max(1, CACHE_TTL_WX // (2 * CACHE_REFRESH_SECS))
+    tick = 0
+    while True:
+        for day in DAYS:
+            try: fetch_availability_for_day.refresh(day)
+            except Exception: pass
+        if tick % wx_every == 0:
+            try: fetch_weather_days.refresh()
+            except Exception: pass
+        tick += 1
+        time.sleep(CACHE_REFRESH_SECS)
+
+# Skip the reloader's parent process when running in debug mode
+if CACHE_REFRESH_SECS > 0 and (not app.debug or os.environ.get("WERKZEUG_RUN_MAIN")):
+    threading.Thread(target=_refresher, name="cc-refresh", daemon=True).start()
+
 def pick_best_court(day, want_window, avail_map):
     """
     Choose the best court given preferred window and availability map.
@@ -218,43 +554,38 @@ def pick_best_court(day, want_window, avail_map):
     if not want_window: return None
     start_want = (want_window[0] + want_window[1]) // 2  # mid-point
 
-    def slot_mid_minutes(slot_text):
-        win = parse_time_window(slot_text)
-        if not win: return None
-        return (win[0] + win[1]) // 2
+    # Score every slot once up front: court -> [(diff_min, overlaps_want, slot_text), ...]
+    scored = {}
+    for c in ALL_COURTS:
+        items = []
+        for s in avail_map.get(c, []):
+            sw = parse_time_window(s)
+            if not sw: continue
+            overlaps = sw[1] >= want_window[0] and sw[0] <= want_window[1]  # exact-ish match
+            items.append((minute_diff((sw[0] + sw[1]) // 2, start_want), overlaps, s))
+        scored[c] = items
 
-    # Helper to scan with a set of courts and exact/near flag
+    # One pass over a set of courts, keeping the first of equal diffs in court order;
+    # a zero-diff slot can't be beaten, so stop there
     def scan(courts, exact=True):
         best = None
-        for c in courts:
-            for s in avail_map.get(c, []):
-                sw = parse_time_window(s)
-                if not sw: continue
-                if exact:
-                    # exact-ish: overlapping windows
-                    if not (sw[1] >= want_window[0] and sw[0] <= want_window[1]):
-                        continue
-                mid = (sw[0] + sw[1]) // 2
-                diff = minute_diff(mid, start_want)
-                if (best is None) or (diff < best["diff_min"]):
-                    best = {"court": c, "slot": s, "match": "exact" if exact else "near", "diff_min": diff}
-        return best
+        for cand in ((d, c, s) for c in courts for d, ov, s in scored[c] if ov or not exact):
+            if best is None or cand[0] < best[0]:
+                best = cand
+                if not best[0]: break
+        if best is None: return None
+        diff, c, s = best
+        return {"court": c, "slot": s, "match": "exact" if exact else "near", "diff_min": diff}
 
     # Try exact on preferred → exact on others → near on preferred → near on others
-    others = [c for c in ALL_COURTS if c not in PREFERRED_COURTS]
-    for courts, exact in [(PREFERRED_COURTS, True), (others, True), (PREFERRED_COURTS, False), (others, False)]:
+    for courts, exact in [(PREFERRED_COURTS, True), (OTHER_COURTS, True), (PREFERRED_COURTS, False), (OTHER_COURTS, False)]:
         found = scan(courts, exact=exact)
         if found: return found
     return None
 
 # --------------- Templates ---------------
-BASE = """
-<!doctype html><html lang="en"><head>
-<meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
-<title>{{ app_name }}</title>
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;800&display=swap" rel="stylesheet">
-<style>
+# Served as its own long-cached asset; the hash in the URL changes whenever the CSS does
+CSS = """
 :root{--bg:#0b1220;--card:#121a2b;--glass:rgba(255,255,255,.06);--text:#e8eefc;--muted:#9fb0d6;--primary:#5ea1ff;--accent:#22d3ee;--success:#22c55e;--warn:#f59e0b;--danger:#ef4444;--border:#1f2a44;--shadow:0 12px 28px rgba(0,0,0,.35)}
 *{box-sizing:border-box} html,body{margin:0;padding:0;background:linear-gradient(180deg,#0a0f1a,#0b1220);color:var(--text);font-family:Inter,system-ui,Segoe UI,Roboto,Arial,sans-serif}
 .page{max-width:1100px;margin:24px auto;padding:0 18px;position:relative}
@@ -286,7 +617,20 @@ input,select{width:100%;padding:12px;border-radius:10px;border:1px solid var(--b
 .voters{color:var(--muted);font-size:13px;margin-top:4px}
 .footer{margin:18px 0;color:var(--muted);text-align:center}
 @keyframes fadeIn {from{opacity:0;transform:translateY(4px)} to{opacity:1;transform:none}}
-</style></head><body><div class="page">
+"""
+# Minify once at import: whitespace around CSS punctuation carries no meaning
+CSS = re.sub(r"\s*([{};:,])\s*", r"\1", CSS).strip()
+CSS_HASH = hashlib.md5(CSS.encode()).hexdigest()[:8]
+
+BASE = """
+<!doctype html><html lang="en"><head>
+<meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>{{ app_name }}</title>
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;800&display=swap" rel="stylesheet">
+<link rel="stylesheet" href="{{ urls.css }}">
+</head><body><div class="page">
 
 <div class="side-art">
   <div class="paddle"></div>
@@ -295,12 +639,17 @@ input,select{width:100%;padding:12px;border-radius:10px;border:1px solid var(--b
 </div>
 
 <div class="header"><div class="brand"><div class="logo">🏓</div><div class="title">{{ app_name }}</div></div>
-<div class="nav"><a href="{{ url_for('home') }}">Vote</a><a href="{{ url_for('results') }}">Results</a></div></div>
-{% with messages = get_flashed_messages(with_categories=true) %}{% for cat,msg in messages %}<div class="flash {{ cat }}">{{ msg }}</div>{% endfor %}{% endwith %}
+<div class="nav"><a href="{{ urls.home }}">Vote</a><a href="{{ urls.results }}">Results</a></div></div>
+{{ flashes|safe }}
 {{ content|safe }}
 <div class="footer">© {{ app_name }}</div>
 </div></body></html>
 """
+# BASE has no <pre>/<textarea>/<script>, so whitespace between tags can go
+BASE = re.sub(r">\s+<", "><", BASE).strip()
+
+# The only per-request part of the page chrome
+FLASHES = """{% with messages = get_flashed_messages(with_categories=true) %}{% for cat,msg in messages %}<div class="flash {{ cat }}">{{ msg }}</div>{% endfor %}{% endwith %}"""
 
 INDEX = """
 <div class="glass"><h1 class="heading">Weekend Pickleball Poll — Walton Fitness Centre</h1>
@@ -322,10 +671,30 @@ INDEX = """
     </div>
     <div style="display:flex;gap:10px;flex-wrap:wrap">
       <button class="btn primary" type="submit">Submit Vote</button>
-      <a class="btn" href="{{ url_for('results') }}">Go to Results</a>
+      <a class="btn" href="{{ urls.results }}">Go to Results</a>
     </div>
   </form>
+  <div id="vote-msg" class="flash" hidden></div>
 </div>
+
+<script>
+// Submit in place with one round-trip; falls back to a normal POST if fetch fails
+(function(){
+  var form = document.querySelector("form.form"), box = document.getElementById("vote-msg");
+  form.addEventListener("submit", function(ev){
+    ev.preventDefault();
+    fetch("{{ urls.home }}?json=1", {method: "POST", body: new FormData(form), headers: {"Accept": "application/json"}})
+      .then(function(r){ return r.json(); })
+      .then(function(d){
+        box.className = "flash " + (d.ok ? "success" : "error");
+        box.textContent = d.ok ? d.message : d.error;
+        box.hidden = false;
+        if (d.ok) form.reset();
+      })
+      .catch(function(){ form.submit(); });
+  });
+})();
+</script>
 """
 
 RESULTS = """
@@ -350,121 +719,310 @@ RESULTS = """
     <b>{{ s.majority.day }}</b> • <b>{{ s.majority.time_text }}</b>
     <span class="sub">({{ s.majority.votes }} vote{{ '' if s.majority.votes==1 else 's' }})</span>
   </p>
-  {% if s.suggestion %}
-    <p style="margin-top:8px">Suggested Court: <b>{{ s.suggestion.court }}</b> — <b>{{ s.suggestion.slot }}</b>
-    <span class="badge">{{ 'Exact match' if s.suggestion.match=='exact' else 'Nearest time' }}</span></p>
-    <form method="POST" action="{{ url_for('book_court') }}">
+  <div id="suggestion">
+    <p class="sub" data-sugg="status">Checking court availability…</p>
+    <form method="POST" action="{{ urls.book }}" hidden>
+      <p style="margin-top:8px">Suggested Court: <b data-sugg="court"></b> — <b data-sugg="slot"></b>
+      <span class="badge" data-sugg="match"></span></p>
       <input type="hidden" name="day" value="{{ s.majority.day }}">
-      <input type="hidden" name="court" value="{{ s.suggestion.court }}">
+      <input type="hidden" name="court" value="">
       <button class="btn primary" type="submit">Book Court</button>
     </form>
-  {% else %}
-    <p class="sub">No suitable court/slot found yet for the majority time.</p>
-  {% endif %}
+  </div>
   <p class="note">Ranking logic: votes → preferred courts (1–4) → exact time → nearest time.</p>
 </div>
 {% endif %}
 
-<div class="card">
+<div class="card" id="availability" data-src="{{ urls.api_availability }}?day={{ day }}&v={{ votes_v }}">
   <h3 style="margin-top:0">Real-Time Availability for {{ s.majority.day if s.majority else 'Saturday/Sunday' }}</h3>
   <div class="table">
     <div class="row head"><div>Court</div><div>Open Slots</div><div>Preferred</div></div>
-    {% for c in courts %}
-      <div class="row">
-        <div>{{ c }}</div>
-        <div>{% if avail.get(c) and avail.get(c)|length > 0 %}{{ avail.get(c) | join(', ') }}{% else %}—{% endif %}</div>
-        <div>{% if c in preferred %}Yes{% else %}—{% endif %}</div>
-      </div>
-    {% endfor %}
+    {{ court_rows }}
   </div>
 </div>
 
+<script>
+// Availability is scraped upstream, so it is fetched after the page renders
+(function(){
+  var card = document.getElementById("availability");
+  fetch(card.dataset.src).then(function(r){ return r.json(); }).then(function(data){
+    card.querySelectorAll("[data-court]").forEach(function(el){
+      var slots = data.slots[el.dataset.court] || [];
+      el.textContent = slots.length ? slots.join(", ") : "—";
+    });
+    var box = document.getElementById("suggestion");
+    if (!box) return;
+    var s = data.suggestion, status = box.querySelector('[data-sugg="status"]');
+    if (!s) { status.textContent = "No suitable court/slot found yet for the majority time."; return; }
+    box.querySelector('[data-sugg="court"]').textContent = s.court;
+    box.querySelector('[data-sugg="slot"]').textContent = s.slot;
+    box.querySelector('[data-sugg="match"]').textContent = s.match == "exact" ? "Exact match" : "Nearest time";
+    box.querySelector('input[name="court"]').value = s.court;
+    box.querySelector("form").hidden = false;
+    status.hidden = true;
+  }).catch(function(){
+    card.querySelectorAll("[data-court]").forEach(function(el){ el.textContent = "—"; });
+  });
+})();
+</script>
+
 <div class="card">
   <h3 style="margin-top:0">Votes (who chose what)</h3>
   <div class="table">
     <div class="row head"><div>Name</div><div>Day</div><div>Time</div></div>
-    {% for v in raw_votes %}
-      <div class="row"><div>{{ v.name }}</div><div>{{ v.day }}</div><div>{{ v.time_text }}</div></div>
-    {% else %}
-      <div class="row"><div>No votes yet.</div><div></div><div></div></div>
-    {% endfor %}
+    {{ vote_rows }}
   </div>
 </div>
 """
 
+# Compile once at import. app.jinja_env still provides get_flashed_messages;
+# route URLs come from URLS (resolved once, below the routes).
+# The court list never changes, so its rows are escaped and rendered once as Markup
+# (autoescape passes it straight through) instead of looping per request
+COURT_ROWS = Markup("".join(
+    f'<div class="row"><div>{escape(c)}</div><div data-court="{escape(c)}">…</div>'
+    f'<div>{"Yes" if c in PREFERRED_COURTS else "—"}</div></div>'
+    for c in ALL_COURTS
+))
+
+def vote_rows(rows):
+    """The votes table rows as one Markup string: a single join instead of a Jinja loop."""
+    if not rows:
+        return Markup('<div class="row"><div>No votes yet.</div><div></div><div></div></div>')
+    return Markup("".join(
+        f'<div class="row"><div>{escape(name)}</div><div>{escape(day)}</div><div>{escape(time_text)}</div></div>'
+        for name, day, time_text in rows
+    ))
+
+BASE_T    = app.jinja_env.from_string(BASE)
+FLASHES_T = app.jinja_env.from_string(FLASHES)
+INDEX_T   = app.jinja_env.from_string(INDEX)
+RESULTS_T = app.jinja_env.from_string(RESULTS)
+# Changes whenever the results page markup does, so a deploy invalidates old ETags
+RESULTS_PAGE_V = hashlib.md5((BASE + RESULTS + CSS_HASH).encode()).digest()
+
+_FLASH_MARK   = "<!--cc:flashes-->"
+_CONTENT_MARK = "<!--cc:content-->"
+_SHELL = None
+
+def page_shell():
+    """
+    BASE is static apart from flashes and content: render it once and split it
+    into (head, mid, tail) strings.
+    """
+    global _SHELL
+    if _SHELL is None:
+        html = BASE_T.render(app_name=APP_NAME, urls=URLS, flashes=_FLASH_MARK, content=_CONTENT_MARK)
+        head, rest = html.split(_FLASH_MARK)
+        mid, tail = rest.split(_CONTENT_MARK)
+        _SHELL = (head, mid, tail)
+    return _SHELL
+
+def render_view(tpl, **ctx):
+    """Render a precompiled page template inside the BASE shell."""
+    head, mid, tail = page_shell()
+    return head + FLASHES_T.render() + mid + tpl.render(urls=URLS, **ctx) + tail
+
+def stream_body(render_body):
+    """
+    Stream a page: BASE's head, nav and flashes go out right away, the body
+    once render_body() (which may wait on upstream fetches) returns its HTML.
+    """
+    head, mid, tail = page_shell()
+    # Pop flashes now: the session cookie is written before the body streams
+    first = head + FLASHES_T.render() + mid
+    def gen():
+        yield first
+        yield render_body()
+        yield tail
+    return Response(stream_with_context(gen()), mimetype="text/html")
+
 # --------------- Routes ---------------
+_HEALTH_BODY = b'{"ok":true}\n'  # constant, so skip jsonify on every liveness probe
+
 @app.get("/health")
-def health(): return jsonify(ok=True), 200
+def health(): return Response(_HEALTH_BODY, mimetype="application/json")
+
+@app.get("/assets/app.<css_hash>.css")
+def app_css(css_hash):
+    """Stylesheet under a content-hashed name, so browsers may cache it forever."""
+    resp = Response(CSS, mimetype="text/css")
+    if css_hash == CSS_HASH:
+        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        # a page cached from before a deploy still asks for the old hash: style it with
+        # the current sheet, but don't let that copy stick under the old name
+        resp.headers["Cache-Control"] = "public, max-age=300"
+    return resp
 
 @app.route("/", methods=["GET","POST"])
 def home():
     if request.method == "POST":
+        # ?json=1 (the page's fetch() path) skips the redirect + full /results render
+        wants_json = request.args.get("json") == "1" or request.accept_mimetypes.best == "application/json"
         name = (request.form.get("name") or "").strip()
         day = request.form.get("day")
         time_text = (request.form.get("time_text") or "").strip()
-        if not name or day not in DAYS or not time_text:
-            flash("Please enter your name, select a valid day, and provide a time like '9-10am'.", "error")
-            return redirect(url_for("home"))
-        conn = db()
-        conn.execute(
-            "INSERT INTO votes(name, day, time_text, ts) VALUES(?,?,?,?) "
-            "ON CONFLICT(name) DO UPDATE SET day=excluded.day, time_text=excluded.time_text, ts=excluded.ts",
-            (name, day, time_text, datetime.now(timezone.utc).isoformat())
-        )
-        conn.commit(); conn.close()
+        if not name or day not in _DAYS_SET or not time_text:
+            msg = "Please enter your name, select a valid day, and provide a time like '9-10am'."
+            if wants_json: return jsonify(ok=False, error=msg), 400
+            flash(msg, "error")
+            return redirect(URLS["home"])
+        with DB_LOCK:
+            # ts is stamped by SQLite (UTC, ms precision) in the same statement as the write
+            db().execute(
+                "INSERT INTO votes(name, day, time_text, ts, name_key) VALUES(?,?,?, strftime('%Y-%m-%dT%H:%M:%fZ','now'), ?) "
+                "ON CONFLICT(name_key) DO UPDATE SET name=excluded.name, day=excluded.day, time_text=excluded.time_text, ts=excluded.ts",
+                (name, day, time_text, name_key(name))
+            )
+        if wants_json: return jsonify(ok=True, message="Vote submitted. Thanks!")
         flash("Vote submitted. Thanks!", "success")
-        return redirect(url_for("results"))
-    return render_template_string(BASE, content=render_template_string(INDEX, days=DAYS), app_name=APP_NAME)
+        return redirect(URLS["results"])
+    return render_view(INDEX_T, days=DAYS)
+
+def results_etag(vote_stamp, wx):
+    """
+    The dashboard HTML depends only on the votes and the forecast (availability is
+    fetched by the page) and the page markup, so hash (markup version, vote count,
+    latest ts, forecast) into an ETag.
+    """
+    h = hashlib.md5(RESULTS_PAGE_V)
+    h.update(repr(tuple(vote_stamp)).encode())
+    h.update(orjson.dumps(wx, option=orjson.OPT_SORT_KEYS))
+    return h.hexdigest()
+
+# Rendered /results bodies, keyed on their content tag. The tag covers everything the
+# body is built from: the vote stamp (read from SQLite, so a vote taken by another
+# worker still busts it), the forecast and the page markup, so a body never outlives
+# its ETag. A few recent tags are kept so alternating forecasts don't evict each other.
+RESULTS_CACHE_MAX = 8
+_RESULTS_CACHE = {}  # tag -> (chosen_day, body_html), oldest first
+_RESULTS_LOCK = threading.Lock()
 
 @app.get("/results")
 def results():
-    # Pull raw votes
-    conn = db()
-    rows = conn.execute("SELECT name, day, time_text FROM votes").fetchall()
-    conn.close()
+    # Weather (Sat/Sun) doesn't depend on the votes, so start it right away
+    wx_future = fetch_weather_days.future()
 
-    # Majority (day + time window)
-    majority = majority_choice(rows)
+    with DB_LOCK:
+        vote_stamp = db().execute("SELECT COUNT(*), MAX(ts) FROM votes").fetchone()
 
-    # Weather (Sat/Sun)
-    wx = fetch_weather_days()
+    # Unchanged since the browser's copy? Only decidable without waiting when the
+    # forecast is cached, and never while flash messages are waiting to be shown.
+    wx_cached = fetch_weather_days.peek()
+    tag = results_etag(vote_stamp, wx_cached) if wx_cached else None
+    etag = tag if "_flashes" not in session else None
+    # Flask-Compress sends the tag as "<etag>:br" / "<etag>:gzip", so match any variant
+    sent = next((t for t in request.if_none_match if t.split(":")[0] == etag), None) if etag else None
+    if sent:
+        resp = Response(status=304)
+        resp.set_etag(sent)
+        return resp
 
-    # Real-time availability for chosen majority day (or Saturday if none yet)
+    # Same votes and forecast: reuse the body another viewer rendered.
+    # Cold forecast (no tag yet): render once it arrives, uncached.
+    with _RESULTS_LOCK:
+        hit = _RESULTS_CACHE.get(tag) if tag else None
+    if hit:
+        chosen_day, body = hit
+        fetch_availability_for_day.future(chosen_day)
+        # nothing to wait for, so no point streaming
+        head, mid, tail = page_shell()
+        resp = Response(head + FLASHES_T.render() + mid + body + tail, mimetype="text/html")
+        return _with_etag(resp, etag)
+
+    # Raw votes for the "who chose what" table, alphabetical (walks idx_votes_name_key);
+    # the majority is tallied from the same rows, so this is the only read.
+    # No votes yet (the usual early-week state): the stamp already says so.
+    if vote_stamp[0]:
+        with DB_LOCK:
+            rows = db().execute("SELECT name, day, time_text FROM votes ORDER BY name_key").fetchall()
+        majority = current_majority(None, rows=rows)
+    else:
+        rows, majority = [], None
+
+    # Availability for the majority day (or Saturday if none yet) is loaded by the
+    # page from /api/availability; warm the cache so that call is quick
     chosen_day = majority["day"] if majority else "Saturday"
-    avail = fetch_availability_for_day(chosen_day)
+    fetch_availability_for_day.future(chosen_day)
 
-    # Suggest court from availability
-    suggestion = pick_best_court(chosen_day, majority["window"] if majority else None, avail) if majority else None
+    def build_ctx():
+        # Compose summary object
+        summary = {
+            "total_players": len(rows),
+            "majority": majority,
+        }
+        return dict(
+            summary=summary,
+            # the forecast the tag was computed from, so body and ETag always match
+            wx=wx_cached if tag else wx_future.result(),
+            day=chosen_day,
+            court_rows=COURT_ROWS,
+            vote_rows=vote_rows(rows),
+            # busts cached /api/availability copies (and their suggestion) once the votes change
+            votes_v=hashlib.md5(repr(tuple(vote_stamp)).encode()).hexdigest()[:8],
+        )
 
-    # Compose summary object
-    summary = {
-        "total_players": len(rows),
-        "majority": majority,
-        "suggestion": suggestion
-    }
+    def render_body():
+        body = RESULTS_T.render(urls=URLS, **build_ctx())
+        if tag:
+            with _RESULTS_LOCK:
+                _RESULTS_CACHE.pop(tag, None)
+                _RESULTS_CACHE[tag] = (chosen_day, body)
+                while len(_RESULTS_CACHE) > RESULTS_CACHE_MAX:
+                    del _RESULTS_CACHE[next(iter(_RESULTS_CACHE))]
+        return body
 
-    html = render_template_string(
-        RESULTS,
-        summary=summary,
-        wx=wx,
-        avail=avail,
-        courts=ALL_COURTS,
-        preferred=PREFERRED_COURTS,
-        raw_votes=rows
-    )
-    return render_template_string(BASE, content=html, app_name=APP_NAME)
+    return _with_etag(stream_body(render_body), etag)
+
+def _with_etag(resp, etag):
+    if etag:
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+@app.get("/api/availability")
+def api_availability():
+    """Open slots per court for ?day=, plus the suggested court for the majority pick."""
+    day = request.args.get("day", "Saturday")
+    if day not in _DAYS_SET:
+        return jsonify(error="invalid day"), 400
+    avail = fetch_availability_for_day(day)
+
+    # Suggest court from availability
+    with DB_LOCK:
+        majority = current_majority(db())
+    suggestion = pick_best_court(day, majority["window"], avail) if majority and majority["day"] == day else None
+    resp = jsonify(day=day, slots=avail, suggestion=suggestion)
+    # Slots are scraped at most every CACHE_TTL_AVAIL anyway, so the browser may reuse a
+    # copy briefly; the page's ?v= (vote stamp) changes the URL when the majority may have
+    # moved. private: the scrape can run under the operator's CLUB_COOKIE session, so
+    # shared proxies/CDNs must not keep it.
+    resp.headers["Cache-Control"] = "private, max-age=15, stale-while-revalidate=60"
+    resp.add_etag()
+    return resp.make_conditional(request)
 
 @app.post("/book")
 def book_court():
     """Redirect to booking site with simple query params."""
     day = (request.form.get("day") or "").strip()
     court = (request.form.get("court") or "").strip()
-    if day not in DAYS or court not in ALL_COURTS:
+    if day not in _DAYS_SET or court not in _COURTS_SET:
         flash("Invalid booking selection.", "error")
-        return redirect(url_for("results"))
+        return redirect(URLS["results"])
     sep = "&" if "?" in BOOKING_URL else "?"
     target = f"{BOOKING_URL}{sep}day={day}&court={court}"
     return redirect(target, code=302)
 
+# Route URLs never change at runtime, so resolve them once instead of per render
+with app.test_request_context():
+    URLS = {
+        "home": url_for("home"),
+        "css": url_for("app_css", css_hash=CSS_HASH),
+        "results": url_for("results"),
+        "book": url_for("book_court"),
+        "api_availability": url_for("api_availability"),
+    }
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))